@@ -1,13 +1,37 @@
 import os
 import json
+import orjson
+try:
+    import zstandard as zstd
+except ImportError:  # cached JSON is then stored uncompressed
+    zstd = None
+import asyncio
+import functools
 import datetime
-from typing import Optional
+from typing import Callable, Iterator, Optional
 from google import genai
 from google.adk.agents import Agent
 from dotenv import load_dotenv
 import time
+import hashlib
+import threading
+import math
+import struct
+import uuid
+import tempfile
+import sqlite3
+import unicodedata
+from urllib.parse import urlparse
+from collections import OrderedDict
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 import feedparser
+try:
+    from lxml import etree
+except ImportError:  # feedparser remains the fallback parser
+    etree = None
 from pathlib import Path
 
 # --- Load environment variables ---
@@ -18,42 +42,755 @@ if not GEMINI_API_KEY:
         "❌ GEMINI_API_KEY not found. Add it in your .env file:\nGEMINI_API_KEY=YOUR_API_KEY_HERE"
     )
 
-# --- Initialize Gemini client ---
-client = genai.Client(api_key=GEMINI_API_KEY)
+# --- Lazily-built per-process singletons (forked server workers each build their own) ---
+def _lazy_singleton(factory):
+    """lru_cache(maxsize=1) with a lock so concurrent first calls build only one instance."""
+    cached = functools.lru_cache(maxsize=1)(factory)
+    lock = threading.Lock()
+
+    @functools.wraps(factory)
+    def get():
+        with lock:
+            return cached()
+
+    get.cache_clear = cached.cache_clear
+    return get
+
+
+@_lazy_singleton
+def get_client() -> genai.Client:
+    return genai.Client(api_key=GEMINI_API_KEY)
 
 # --- Local cache folder ---
 CACHE_DIR = Path("cache")
 CACHE_DIR.mkdir(exist_ok=True)
 NEWS_CACHE_FILE = CACHE_DIR / "news_cache.json"
+ANALYSIS_DB_FILE = CACHE_DIR / "cache.db"
+FEED_META_FILE = CACHE_DIR / "feed_meta.json"
 
-# --- Helper function: fetch feed using requests ---
-def fetch_feed(url: str, retries: int = 3, delay: int = 5) -> Optional[feedparser.FeedParserDict]:
-    """Fetch RSS feed using requests with retries."""
-    for attempt in range(retries):
+
+# --- Helpers: cached JSON on disk (zstd-compressed "<name>.zst" when available) ---
+def _zst_path(path: Path) -> Path:
+    return path.with_name(path.name + ".zst")
+
+
+def _atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write via a temp file + os.replace so readers never see a half-written file."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def write_json(path: Path, data) -> Path:
+    """Write data as JSON, zstd-compressed when zstandard is installed; returns the file written."""
+    raw = orjson.dumps(data, option=_JSON_OPTIONS)
+    if zstd is not None:
+        target = _zst_path(path)
+        _atomic_write_bytes(target, zstd.ZstdCompressor(level=3).compress(raw))
+    else:
+        target = path
+        _atomic_write_bytes(target, raw)
+    return target
+
+
+def _is_newer(path: Path, other: Path) -> bool:
+    try:
+        return path.stat().st_mtime > other.stat().st_mtime
+    except OSError:
+        return path.exists()
+
+
+def read_json(path: Path):
+    """Read JSON written by write_json, preferring the compressed copy.
+
+    A corrupt compressed copy is skipped, but the plain file is then only trusted if it
+    is newer (otherwise it is stale data from before compression). Returns None when
+    no usable file exists.
+    """
+    compressed = _zst_path(path)
+    if zstd is not None and compressed.exists():
+        try:
+            return orjson.loads(zstd.ZstdDecompressor().decompress(compressed.read_bytes()))
+        except (zstd.ZstdError, orjson.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable cache file {compressed}: {e}")
+        if not _is_newer(path, compressed):
+            return None
+    if path.exists():
+        try:
+            return orjson.loads(path.read_bytes())
+        except (orjson.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Ignoring unreadable cache file {path}: {e}")
+    return None
+
+# --- Analysis store (SQLite: atomic upserts + dedup by article hash / fingerprint) ---
+_db_lock = threading.Lock()
+
+
+@_lazy_singleton
+def get_db() -> sqlite3.Connection:
+    db = sqlite3.connect(ANALYSIS_DB_FILE, check_same_thread=False)
+    with _db_lock, db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses("
+            "hash TEXT PRIMARY KEY, title TEXT, link TEXT, analysis TEXT, ts REAL, fingerprint TEXT)"
+        )
+        # Stores created before the fingerprint column existed
+        if "fingerprint" not in {row[1] for row in db.execute("PRAGMA table_info(analyses)")}:
+            db.execute("ALTER TABLE analyses ADD COLUMN fingerprint TEXT")
+        db.execute("CREATE INDEX IF NOT EXISTS analyses_ts ON analyses(ts)")
+        db.execute("CREATE INDEX IF NOT EXISTS analyses_fingerprint ON analyses(fingerprint)")
+    return db
+
+
+def _article_hash(art: dict) -> str:
+    return hashlib.sha256((art["title"] + art["link"]).encode("utf-8")).hexdigest()
+
+
+def _article_fingerprint(art: dict) -> str:
+    """Content fingerprint: catches the same story re-published under a different link."""
+    return hashlib.blake2b((art["title"] + art["summary"]).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _load_stored_analyses(hashes: list, fingerprints: list) -> tuple:
+    """Returns ({hash: analysis}, {fingerprint: analysis}) for already-analyzed articles."""
+    if not hashes and not fingerprints:
+        return {}, {}
+    db = get_db()
+    with _db_lock:
+        rows = db.execute(
+            f"SELECT hash, fingerprint, analysis FROM analyses "
+            f"WHERE hash IN ({','.join('?' * len(hashes))}) "
+            f"OR fingerprint IN ({','.join('?' * len(fingerprints))})",
+            [*hashes, *fingerprints],
+        ).fetchall()
+    by_hash = {h: analysis for h, _, analysis in rows}
+    by_fingerprint = {fp: analysis for _, fp, analysis in rows if fp}
+    return by_hash, by_fingerprint
+
+
+def _store_analyses(rows: list) -> None:
+    """rows: [(hash, title, link, analysis, fingerprint)]"""
+    now = time.time()
+    db = get_db()
+    with _db_lock, db:
+        db.executemany(
+            "INSERT OR IGNORE INTO analyses(hash, title, link, analysis, fingerprint, ts) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(*row, now) for row in rows],
+        )
+
+
+def recent_analyses(limit: int = 15) -> list:
+    """Most recent stored analyses, newest first."""
+    db = get_db()
+    with _db_lock:
+        rows = db.execute(
+            "SELECT analysis FROM analyses ORDER BY ts DESC LIMIT ?", (limit,)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+# --- Prompt templates ---
+BATCH_ANALYSIS_PROMPT_TEMPLATE = """
+You are **Opposition AI Kenya**, a civic digital agent helping citizens analyze government actions.
+
+Analyze EACH article in the JSON array below through 5 lenses:
+
+1️⃣ Checks & Balances – Any misuse of power?
+2️⃣ Critique & Challenge – What risks exist?
+3️⃣ Citizen Impact – Who benefits or suffers?
+4️⃣ Accountability – Are promises or transparency lacking?
+5️⃣ Alternative Proposals – Suggest better realistic actions.
+
+Articles:
+{articles_json}
+
+Be factual, concise, and aware of the Kenyan context.
+
+Respond with a JSON array containing one object per article:
+{{"id": <the article's id>, "analysis": "<the full 5-lens analysis as text>"}}
+"""
+
+ANALYSIS_PROMPT_TEMPLATE = """
+You are **Opposition AI Kenya**, a civic digital agent helping citizens analyze government actions.
+
+Analyze this article through 5 lenses:
+
+1️⃣ Checks & Balances – Any misuse of power?
+2️⃣ Critique & Challenge – What risks exist?
+3️⃣ Citizen Impact – Who benefits or suffers?
+4️⃣ Accountability – Are promises or transparency lacking?
+5️⃣ Alternative Proposals – Suggest better realistic actions.
+                                                 
+Article:
+Title: {title}
+Summary: {summary}
+Source: {link}
+
+Be factual, concise, and aware of the Kenyan context.
+"""
+
+CITIZEN_PROMPT_TEMPLATE = """
+You are **Opposition AI Kenya**, an intelligent civic assistant that must always respond with current, real-time awareness.
+
+Today's date is **{current_date}**.
+
+A Kenyan citizen asks:
+"{question}"
+
+Provide:
+- A factual, up-to-date explanation that reflects Kenya’s current situation (as of {current_date}).
+- Include recent developments or current government actions if relevant.
+- Offer helpful civic context about accountability or transparency.
+- Suggest possible citizen or civil-society actions in a simple, human tone.
+
+Be polite, realistic, and speak as if you are guiding a citizen today in {current_year}.
+"""
+
+POLICY_PROMPT_TEMPLATE = """
+You are 'Opposition AI Kenya' — a civic digital agent.
+Based on the following recent government news analyses, provide **3-5 concrete, realistic, and actionable policy recommendations**
+for the Kenyan government. Focus on improving transparency, citizen welfare, and economic growth.
+
+Analyses Context:
+{context}
+
+Respond in clear, concise, citizen-friendly English. Number each recommendation.
+"""
+
+# --- LLM response cache (Redis if REDIS_URL is set, else in-process) ---
+# Caps the in-process cache only; in Redis, entries expire via EX and the server's
+# maxmemory-policy (e.g. allkeys-lru) handles eviction
+LLM_CACHE_MAX_ENTRIES = 512
+_redis = None
+if os.environ.get("REDIS_URL"):
+    try:
+        import redis
+        _redis = redis.from_url(os.environ["REDIS_URL"])
+        _redis.ping()
+    except Exception as e:
+        print(f"⚠️ Redis unavailable, using in-process LLM cache: {e}")
+        _redis = None
+
+_local_llm_cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+_local_llm_cache_lock = threading.Lock()
+
+
+def _cache_get(key: str) -> Optional[str]:
+    if _redis is not None:
+        try:
+            value = _redis.get(key)
+            return value.decode("utf-8") if value is not None else None
+        except Exception as e:
+            print(f"⚠️ Redis read error: {e}")
+            return None
+    with _local_llm_cache_lock:
+        entry = _local_llm_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del _local_llm_cache[key]
+            return None
+        _local_llm_cache.move_to_end(key)
+        return value
+
+
+def _cache_set(key: str, value: str, ttl: int) -> None:
+    if _redis is not None:
         try:
-            response = requests.get(
-                url,
-                timeout=10,
-                headers={
-                    "User-Agent": (
-                        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36"
-                    )
-                },
-                verify=True,  # ✅ ensure SSL verification is on
+            _redis.set(key, value, ex=ttl)
+        except Exception as e:
+            print(f"⚠️ Redis write error: {e}")
+        return
+    with _local_llm_cache_lock:
+        _local_llm_cache[key] = (time.time() + ttl, value)
+        _local_llm_cache.move_to_end(key)
+        while len(_local_llm_cache) > LLM_CACHE_MAX_ENTRIES:
+            _local_llm_cache.popitem(last=False)
+
+
+def _llm_cache_key(model: str, prompt: str, config: Optional[dict]) -> str:
+    key_source = model + "\0" + prompt
+    if config:
+        key_source += "\0" + json.dumps(config, sort_keys=True)
+    return "llm:" + hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+
+def cached_generate(
+    model: str,
+    prompt: str,
+    ttl: int = 86400,
+    config: Optional[dict] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> Optional[str]:
+    """Return Gemini's text for a prompt, reusing a cached answer for identical prompts.
+
+    Replies are only cached when non-empty and, if given, accepted by validate.
+    """
+    key = _llm_cache_key(model, prompt, config)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    resp = get_client().models.generate_content(model=model, contents=prompt, config=config)
+    ai_text = getattr(resp, "text", None)
+    if ai_text and (validate is None or validate(ai_text)):
+        _cache_set(key, ai_text, ttl)
+    return ai_text
+
+
+async def cached_generate_async(
+    aio_client, model: str, prompt: str, ttl: int = 86400, config: Optional[dict] = None
+) -> Optional[str]:
+    """Async twin of cached_generate; aio_client must belong to the running event loop."""
+    key = _llm_cache_key(model, prompt, config)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
+    resp = await aio_client.models.generate_content(model=model, contents=prompt, config=config)
+    ai_text = getattr(resp, "text", None)
+    if ai_text:
+        _cache_set(key, ai_text, ttl)
+    return ai_text
+
+
+def cached_generate_stream(model: str, prompt: str, ttl: int = 86400) -> Iterator[str]:
+    """Yield Gemini's text as it is generated; a cached answer is yielded in one piece."""
+    key = _llm_cache_key(model, prompt, None)
+    cached = _cache_get(key)
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    for chunk in get_client().models.generate_content_stream(model=model, contents=prompt):
+        text = getattr(chunk, "text", None)
+        if text:
+            parts.append(text)
+            yield text
+    if parts:
+        _cache_set(key, "".join(parts), ttl)
+
+# --- Semantic cache for citizen questions (matches on question embeddings) ---
+EMBEDDING_MODEL = "text-embedding-004"
+EMBEDDING_DIM = 768
+SEMANTIC_CACHE_INDEX = "idx:citizen_qa"
+SEMANTIC_CACHE_PREFIX = "citizen_qa:"
+SEMANTIC_CACHE_MAX_DISTANCE = 0.15  # cosine distance
+SEMANTIC_CACHE_TTL = 86400          # answers are date-aware, so keep them for a day
+SEMANTIC_CACHE_MAX_ENTRIES = 256
+
+_local_semantic_cache: list = []  # [(expires_at, vector, answer)]
+_local_semantic_cache_lock = threading.Lock()
+
+# True only when Redis has RediSearch vector support; otherwise the local list is used
+_redis_vectors = False
+if _redis is not None:
+    try:
+        _redis.execute_command(
+            "FT.CREATE", SEMANTIC_CACHE_INDEX, "ON", "HASH",
+            "PREFIX", "1", SEMANTIC_CACHE_PREFIX,
+            "SCHEMA",
+            "question", "TEXT",
+            "answer", "TEXT",
+            "embedding", "VECTOR", "HNSW", "6",
+            "TYPE", "FLOAT32", "DIM", str(EMBEDDING_DIM), "DISTANCE_METRIC", "COSINE",
+        )
+        _redis_vectors = True
+    except Exception as e:
+        if "Index already exists" in str(e):
+            _redis_vectors = True
+        else:
+            print(f"⚠️ Redis vector index unavailable, using in-process semantic cache: {e}")
+
+
+def _embed_question(question: str) -> Optional[list]:
+    try:
+        resp = get_client().models.embed_content(model=EMBEDDING_MODEL, contents=question)
+        return list(resp.embeddings[0].values)
+    except Exception as e:
+        print(f"⚠️ Embedding error, skipping semantic cache: {e}")
+        return None
+
+
+def _cosine_distance(a: list, b: list) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return 1.0 - dot / norm if norm else 1.0
+
+
+def _semantic_lookup(embedding: list) -> Optional[str]:
+    """Return a cached answer for a question close enough to one asked before."""
+    if _redis_vectors:
+        try:
+            res = _redis.execute_command(
+                "FT.SEARCH", SEMANTIC_CACHE_INDEX,
+                "*=>[KNN 1 @embedding $vec AS distance]",
+                "PARAMS", "2", "vec", struct.pack(f"{len(embedding)}f", *embedding),
+                "SORTBY", "distance",
+                "RETURN", "2", "answer", "distance",
+                "DIALECT", "2",
             )
-            if response.status_code == 200:
-                return feedparser.parse(response.content)
-            else:
-                print(f"⚠️ HTTP {response.status_code} for {url}")
-        except requests.exceptions.SSLError as ssl_err:
-            print(f"⚠️ SSL error for {url}: {ssl_err}")
+            if res and res[0]:
+                fields = res[2]
+                doc = {fields[i].decode(): fields[i + 1] for i in range(0, len(fields), 2)}
+                if float(doc["distance"]) < SEMANTIC_CACHE_MAX_DISTANCE:
+                    return doc["answer"].decode("utf-8")
+            return None
         except Exception as e:
-            print(f"⚠️ Error fetching {url} (attempt {attempt+1}/{retries}): {e}")
-        time.sleep(delay)
-    print(f"⚠️ Failed to fetch feed after {retries} attempts: {url}")
+            print(f"⚠️ Redis vector search error: {e}")
+
+    now = time.time()
+    with _local_semantic_cache_lock:
+        _local_semantic_cache[:] = [e for e in _local_semantic_cache if e[0] >= now]
+        best = min(
+            ((_cosine_distance(embedding, vec), answer) for _, vec, answer in _local_semantic_cache),
+            default=None,
+            key=lambda item: item[0],
+        )
+    if best and best[0] < SEMANTIC_CACHE_MAX_DISTANCE:
+        return best[1]
     return None
 
+
+def _semantic_store(question: str, embedding: list, answer: str) -> None:
+    if _redis_vectors:
+        try:
+            key = SEMANTIC_CACHE_PREFIX + uuid.uuid4().hex
+            pipe = _redis.pipeline()
+            pipe.hset(key, mapping={
+                "question": question,
+                "answer": answer,
+                "embedding": struct.pack(f"{len(embedding)}f", *embedding),
+            })
+            pipe.expire(key, SEMANTIC_CACHE_TTL)
+            pipe.execute()
+            return
+        except Exception as e:
+            print(f"⚠️ Redis write error: {e}")
+
+    with _local_semantic_cache_lock:
+        _local_semantic_cache.append((time.time() + SEMANTIC_CACHE_TTL, embedding, answer))
+        del _local_semantic_cache[:-SEMANTIC_CACHE_MAX_ENTRIES]
+
+# --- Shared HTTP session (keep-alive + connection pooling across feeds) ---
+# Exponential backoff (0.5s, 1s, 2s) with jitter, honouring Retry-After on 429/503
+# but never waiting longer than RETRY_AFTER_MAX per attempt
+RETRY_AFTER_MAX = 2  # seconds; keeps the worst case near the plain backoff (0.5+1+2s)
+
+
+class _CappedRetry(Retry):
+    """Retry whose Retry-After wait is clamped, so one throttling feed can't park /analyze."""
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), RETRY_AFTER_MAX)
+
+
+_retry_options = dict(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+
+@_lazy_singleton
+def get_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({
+        "User-Agent": (
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36"
+        )
+    })
+    try:
+        retry = _CappedRetry(backoff_jitter=0.5, **_retry_options)
+    except TypeError:  # urllib3 < 2 has no backoff_jitter
+        retry = _CappedRetry(**_retry_options)
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def reset_clients() -> None:
+    """Drop the cached Gemini client, HTTP session and SQLite connection (call after fork,
+    e.g. gunicorn post_fork). The Redis client needs no reset: redis-py pools detect forks."""
+    get_client.cache_clear()
+    get_session.cache_clear()
+    get_db.cache_clear()
+
+# --- Helper functions: parse RSS / RDF / Atom feeds ---
+RSS1_NS = "http://purl.org/rss/1.0/"
+ATOM_NS = "http://www.w3.org/2005/Atom"
+
+
+def _child_text(el, tag: str) -> Optional[str]:
+    """Text of the first direct child with this exact (namespace-qualified) tag."""
+    for child in el.iterchildren(tag):
+        text = "".join(child.itertext()).strip()
+        if text:
+            return text
+    return None
+
+
+def _atom_link(el) -> Optional[str]:
+    for child in el.iterchildren(f"{{{ATOM_NS}}}link"):
+        if child.get("href") and child.get("rel", "alternate") == "alternate":
+            return child.get("href")
+    return None
+
+
+def _parse_feed_lxml(content: bytes) -> Optional[list]:
+    """Extract title/link/summary with lxml; skips feedparser's sanitizing passes.
+
+    Returns None when libxml2 had to recover from malformed XML (bare "&", undefined
+    HTML entities, ...): its recovered text is silently damaged, so the caller should
+    use feedparser for that document instead.
+    """
+    parser = etree.XMLParser(recover=True, huge_tree=False, resolve_entities=False, no_network=True)
+    root = etree.fromstring(content, parser=parser)
+    if any(err.level >= etree.ErrorLevels.ERROR for err in parser.error_log):
+        return None
+    if root is None:
+        return []
+    entries = []
+    # Qualified names only, so extensions like itunes:summary or media:title are ignored:
+    # RSS 2.0 <item> (no namespace), RSS 1.0/RDF <item>, Atom <entry>
+    for ns in ("", RSS1_NS):
+        q = (lambda name: f"{{{ns}}}{name}") if ns else (lambda name: name)
+        for el in root.iter(q("item")):
+            entries.append({
+                "title": _child_text(el, q("title")) or "Untitled",
+                "link": _child_text(el, q("link")) or "No link",
+                "summary": _child_text(el, q("description")) or "No summary available.",
+            })
+    for el in root.iter(f"{{{ATOM_NS}}}entry"):
+        entries.append({
+            "title": _child_text(el, f"{{{ATOM_NS}}}title") or "Untitled",
+            "link": _atom_link(el) or "No link",
+            "summary": (
+                _child_text(el, f"{{{ATOM_NS}}}summary")
+                or _child_text(el, f"{{{ATOM_NS}}}content")
+                or "No summary available."
+            ),
+        })
+    return entries
+
+
+def parse_feed(content: bytes) -> list:
+    """Parse a feed body into a list of {title, link, summary} dicts."""
+    if etree is not None:
+        try:
+            entries = _parse_feed_lxml(content)
+            if entries:
+                return entries
+            if entries is None:
+                print("⚠️ Malformed feed XML, parsing with feedparser instead.")
+        except (etree.XMLSyntaxError, ValueError) as e:
+            print(f"⚠️ lxml could not parse feed, falling back to feedparser: {e}")
+    return [
+        {
+            "title": entry.get("title", "Untitled"),
+            "link": entry.get("link", "No link"),
+            "summary": entry.get("summary", entry.get("description", "No summary available."))
+        }
+        # Summaries only feed an LLM prompt, so skip feedparser's two slowest passes
+        for entry in feedparser.parse(content, sanitize_html=False, resolve_relative_uris=False).entries
+    ]
+
+# --- Conditional GET state: {url: {"etag", "last_modified", "entries"}} ---
+_feed_meta_lock = threading.Lock()
+_feed_meta_dirty = False  # guarded by _feed_meta_lock
+_feed_meta = read_json(FEED_META_FILE) or {}
+
+
+def _conditional_headers(url: str) -> dict:
+    with _feed_meta_lock:
+        meta = _feed_meta.get(url) or {}
+    headers = {}
+    if meta.get("entries"):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    return headers
+
+
+def _remember_feed(url: str, response: requests.Response, entries: list) -> None:
+    """Record validators from a 200 response; forget the URL if it no longer sends any."""
+    global _feed_meta_dirty
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    with _feed_meta_lock:
+        if etag or last_modified:
+            _feed_meta[url] = {"etag": etag, "last_modified": last_modified, "entries": entries}
+        elif _feed_meta.pop(url, None) is None:
+            return
+        _feed_meta_dirty = True
+
+
+def save_feed_meta() -> None:
+    """Persist conditional-GET state once per poll (after all feeds are fetched)."""
+    global _feed_meta_dirty
+    with _feed_meta_lock:
+        if not _feed_meta_dirty:
+            return
+        _feed_meta_dirty = False
+        snapshot = dict(_feed_meta)
+    try:
+        write_json(FEED_META_FILE, snapshot)
+    except OSError as e:
+        with _feed_meta_lock:
+            _feed_meta_dirty = True
+        print(f"⚠️ Could not save feed metadata: {e}")
+
+# --- In-process feed cache: rapid /analyze reloads skip the network entirely ---
+FEED_CACHE_TTL = 300  # seconds; after this the conditional GET above takes over
+_feed_cache: dict = {}  # {url: (expires_at, entries)}
+_feed_cache_lock = threading.Lock()
+
+
+def clear_feed_cache() -> None:
+    with _feed_cache_lock:
+        _feed_cache.clear()
+
+# --- Helper function: fetch feed using requests ---
+def fetch_feed(url: str) -> Optional[list]:
+    """Fetch RSS feed, served from memory for FEED_CACHE_TTL seconds after a successful fetch."""
+    with _feed_cache_lock:
+        cached = _feed_cache.get(url)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
+    entries = _fetch_feed_uncached(url)
+    if entries:
+        with _feed_cache_lock:
+            _feed_cache[url] = (time.time() + FEED_CACHE_TTL, entries)
+    return entries
+
+
+def _fetch_feed_uncached(url: str) -> Optional[list]:
+    """Fetch RSS feed using the shared session (retries/backoff live on its adapter) with conditional GETs."""
+    try:
+        response = get_session().get(
+            url,
+            timeout=10,
+            headers=_conditional_headers(url),
+            verify=True,  # ✅ ensure SSL verification is on
+        )
+    except requests.exceptions.SSLError as ssl_err:
+        print(f"⚠️ SSL error for {url}: {ssl_err}")
+        return None
+    except Exception as e:
+        print(f"⚠️ Failed to fetch feed after retries: {url}: {e}")
+        return None
+
+    if response.status_code == 304:
+        # Unchanged since last poll — reuse the entries parsed back then
+        with _feed_meta_lock:
+            return (_feed_meta.get(url) or {}).get("entries")
+    if response.status_code == 200:
+        entries = parse_feed(response.content)
+        _remember_feed(url, response, entries)
+        return entries
+    print(f"⚠️ HTTP {response.status_code} for {url}")
+    return None
+
+# --- Helpers: Gemini article analysis ---
+ANALYSIS_BATCH_SIZE = 5  # keeps each JSON reply well under the output-token limit
+
+
+def _is_json(text: str) -> bool:
+    try:
+        orjson.loads(text)
+        return True
+    except orjson.JSONDecodeError:
+        return False
+
+
+def _analyze_articles_batch(articles: list) -> dict:
+    """Analyze articles in one JSON-mode request; returns {article index: analysis}."""
+    payload = [
+        {"id": i, "title": art["title"], "summary": art["summary"], "link": art["link"]}
+        for i, art in enumerate(articles)
+    ]
+    prompt = BATCH_ANALYSIS_PROMPT_TEMPLATE.format(
+        articles_json=json.dumps(payload, ensure_ascii=False)
+    )
+    raw = cached_generate(
+        "gemini-2.0-flash",
+        prompt,
+        config={"response_mime_type": "application/json"},
+        validate=_is_json,  # never cache a reply truncated mid-JSON
+    )
+    results = {}
+    for item in orjson.loads(raw or "[]"):
+        try:
+            idx = int(item["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 0 <= idx < len(articles) and item.get("analysis"):
+            results[idx] = str(item["analysis"])
+    return results
+
+
+async def _analyze_article(art: dict, aio_client, semaphore: asyncio.Semaphore) -> dict:
+    """Analyze a single article (used when the batch response misses it)."""
+    prompt = ANALYSIS_PROMPT_TEMPLATE.format_map(art)
+    try:
+        async with semaphore:
+            ai_text = await cached_generate_async(aio_client, "gemini-2.0-flash", prompt)
+        ai_text = ai_text or "⚠️ No analysis generated."
+        return {
+            "title": art["title"],
+            "analysis": ai_text,
+            "source": art["link"]
+        }
+    except Exception as e:
+        return {
+            "title": art["title"],
+            "analysis": f"⚠️ AI generation error: {e}",
+            "source": art["link"]
+        }
+
+async def _analyze_articles_concurrently(articles: list, max_concurrency: int = 5) -> list:
+    """Run the per-article analyses concurrently, bounded to respect Gemini QPS."""
+    # A fresh client per run: its async transport is bound to this event loop,
+    # and every _run_async call gets a new loop
+    aio_client = genai.Client(api_key=GEMINI_API_KEY).aio
+    try:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tasks = [asyncio.create_task(_analyze_article(art, aio_client, semaphore)) for art in articles]
+        return await asyncio.gather(*tasks)
+    finally:
+        aclose = getattr(aio_client, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+
+def _run_async(coro):
+    """asyncio.run, but safe to call from code already inside an event loop (e.g. the ADK agent)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
 # === 1️⃣ Tool: Analyze Government News ===
 def analyze_government_news(_: Optional[str] = None) -> dict:
     feeds = [
@@ -67,23 +804,34 @@ def analyze_government_news(_: Optional[str] = None) -> dict:
         "https://www.aljazeera.com/xml/rss/all.xml",
     ]
 
+    # Feeds are IO-bound, so fetch them concurrently rather than one by one
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        parsed_feeds = list(executor.map(fetch_feed, feeds))
+    save_feed_meta()
+
     articles = []
-    for url in feeds:
-        feed = fetch_feed(url)
-        if feed and feed.entries:
-            for entry in feed.entries[:5]:
-                articles.append({
-                    "title": entry.get("title", "Untitled"),
-                    "link": entry.get("link", "No link"),
-                    "summary": entry.get("summary", entry.get("description", "No summary available."))
-                })
-
-    articles = articles[:15]
-
-    if not articles and NEWS_CACHE_FILE.exists():
-        print("⚠️ Using cached news data.")
-        with open(NEWS_CACHE_FILE, "r", encoding="utf-8") as f:
-            articles = json.load(f)
+    for entries in parsed_feeds:
+        if entries:
+            articles.extend(entries[:5])
+
+    # Drop syndicated duplicates before the limit so it counts unique stories
+    seen = set()
+    unique_articles = []
+    for art in articles:
+        key = hashlib.md5((
+            unicodedata.normalize("NFKD", art["title"]).lower().strip()
+            + "|" + urlparse(art["link"]).path
+        ).encode("utf-8")).digest()
+        if key not in seen:
+            seen.add(key)
+            unique_articles.append(art)
+
+    articles = unique_articles[:15]
+
+    if not articles:
+        articles = read_json(NEWS_CACHE_FILE) or []
+        if articles:
+            print("⚠️ Using cached news data.")
 
     if not articles:
         print("⚠️ No live feeds found — using fallback article.")
@@ -96,46 +844,59 @@ def analyze_government_news(_: Optional[str] = None) -> dict:
             )
         }]
 
-    with open(NEWS_CACHE_FILE, "w", encoding="utf-8") as f:
-        json.dump(articles, f, ensure_ascii=False, indent=4)
+    write_json(NEWS_CACHE_FILE, articles)
 
-    analyses = []
-    for art in articles:
-        prompt = f"""
-You are **Opposition AI Kenya**, a civic digital agent helping citizens analyze government actions.
-
-Analyze this article through 5 lenses:
+    # Articles analyzed on an earlier run come straight from the store,
+    # checked before any prompt is built
+    hashes = [_article_hash(art) for art in articles]
+    fingerprints = [_article_fingerprint(art) for art in articles]
+    by_hash, by_fingerprint = _load_stored_analyses(hashes, fingerprints)
+    results = {}
+    for i, (h, fp) in enumerate(zip(hashes, fingerprints)):
+        cached = by_hash.get(h) or by_fingerprint.get(fp)
+        if cached:
+            results[i] = cached
 
-1️⃣ Checks & Balances – Any misuse of power?
-2️⃣ Critique & Challenge – What risks exist?
-3️⃣ Citizen Impact – Who benefits or suffers?
-4️⃣ Accountability – Are promises or transparency lacking?
-5️⃣ Alternative Proposals – Suggest better realistic actions.
-                                                 
-Article:
-Title: {art['title']}
-Summary: {art['summary']}
-Source: {art['link']}
+    # A few multi-article requests (run in parallel) instead of one round trip per
+    # article; small batches mean one truncated reply only loses its own articles
+    pending = [i for i in range(len(articles)) if i not in results]
+    chunks = [pending[k:k + ANALYSIS_BATCH_SIZE] for k in range(0, len(pending), ANALYSIS_BATCH_SIZE)]
 
-Be factual, concise, and aware of the Kenyan context.
-"""
+    def analyze_chunk(chunk: list) -> dict:
         try:
-            resp = client.models.generate_content(
-                model="gemini-2.0-flash",
-                contents=prompt
-            )
-            ai_text = getattr(resp, "text", None) or "⚠️ No analysis generated."
-            analyses.append({
-                "title": art["title"],
-                "analysis": ai_text,
-                "source": art["link"]
-            })
+            batch_analyses = _analyze_articles_batch([articles[i] for i in chunk])
         except Exception as e:
-            analyses.append({
-                "title": art["title"],
-                "analysis": f"⚠️ AI generation error: {e}",
-                "source": art["link"]
-            })
+            print(f"⚠️ Batch analysis failed, analyzing its articles one by one: {e}")
+            return {}
+        return {chunk[j]: text for j, text in batch_analyses.items()}
+
+    if chunks:
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            for chunk_results in executor.map(analyze_chunk, chunks):
+                results.update(chunk_results)
+
+    missing = [i for i in range(len(articles)) if i not in results]
+    if missing:
+        fallback = _run_async(_analyze_articles_concurrently([articles[i] for i in missing]))
+        for i, analysis in zip(missing, fallback):
+            results[i] = analysis["analysis"]
+
+    new_rows = [
+        (hashes[i], articles[i]["title"], articles[i]["link"], results[i], fingerprints[i])
+        for i in pending
+        if not results[i].startswith("⚠️")
+    ]
+    if new_rows:
+        _store_analyses(new_rows)
+
+    analyses = [
+        {
+            "title": art["title"],
+            "analysis": results[i],
+            "source": art["link"]
+        }
+        for i, art in enumerate(articles)
+    ]
 
     return {
         "status": "success",
@@ -144,56 +905,77 @@ Be factual, concise, and aware of the Kenyan context.
     }
 
 # === 2️⃣ Tool: Answer Citizen Questions (UPDATED FOR REAL-TIME RESPONSES) ===
-def citizen_question(question: str) -> dict:
-    current_date = datetime.datetime.now().strftime("%A, %d %B %Y")
-    prompt = f"""
-You are **Opposition AI Kenya**, an intelligent civic assistant that must always respond with current, real-time awareness.
+def _citizen_answer_chunks(question: str, current_date: str) -> Iterator[str]:
+    """Yield answer chunks (semantic cache first, then Gemini); raises on AI errors."""
+    prompt = CITIZEN_PROMPT_TEMPLATE.format(
+        question=question, current_date=current_date, current_year=current_date.split()[-1]
+    )
+    # Match on the question alone — the date only lives in the prompt, not the cache key
+    embedding = _embed_question(question)
+    if embedding is not None:
+        cached = _semantic_lookup(embedding)
+        if cached:
+            yield cached
+            return
 
-Today's date is **{current_date}**.
+    parts = []
+    for text in cached_generate_stream("gemini-2.0-flash", prompt):
+        parts.append(text)
+        yield text
+    if parts and embedding is not None:
+        _semantic_store(question, embedding, "".join(parts))
 
-A Kenyan citizen asks:
-"{question}"
 
-Provide:
-- A factual, up-to-date explanation that reflects Kenya’s current situation (as of {current_date}).
-- Include recent developments or current government actions if relevant.
-- Offer helpful civic context about accountability or transparency.
-- Suggest possible citizen or civil-society actions in a simple, human tone.
-
-Be polite, realistic, and speak as if you are guiding a citizen today in {current_date.split()[-1]}.
-"""
+def citizen_question(question: str) -> dict:
+    current_date = datetime.datetime.now().strftime("%A, %d %B %Y")
     try:
-        resp = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
-        )
-        ai_text = getattr(resp, "text", None) or "⚠️ No answer generated."
-        return {"answer": ai_text, "date_used": current_date}
+        ai_text = "".join(_citizen_answer_chunks(question, current_date))
+        return {"answer": ai_text or "⚠️ No answer generated.", "date_used": current_date}
     except Exception as e:
         return {"answer": f"⚠️ AI generation error: {e}", "date_used": current_date}
 
+
+def citizen_question_stream(question: str) -> Iterator[str]:
+    """Streaming variant of citizen_question for the web UI; yields answer text chunks."""
+    current_date = datetime.datetime.now().strftime("%A, %d %B %Y")
+    generated = False
+    try:
+        for text in _citizen_answer_chunks(question, current_date):
+            generated = True
+            yield text
+    except Exception as e:
+        yield f"⚠️ AI generation error: {e}"
+        return
+    if not generated:
+        yield "⚠️ No answer generated."
+
 # === 3️⃣ Tool: Policy Recommendation ===
-def policy_recommendation(context: str) -> dict:
-    prompt = f"""
-You are 'Opposition AI Kenya' — a civic digital agent.
-Based on the following recent government news analyses, provide **3-5 concrete, realistic, and actionable policy recommendations**
-for the Kenyan government. Focus on improving transparency, citizen welfare, and economic growth.
+def _policy_chunks(context: str) -> Iterator[str]:
+    """Yield recommendation chunks from Gemini (or the LLM cache); raises on AI errors."""
+    return cached_generate_stream("gemini-2.0-flash", POLICY_PROMPT_TEMPLATE.format(context=context))
 
-Analyses Context:
-{context}
 
-Respond in clear, concise, citizen-friendly English. Number each recommendation.
-"""
+def policy_recommendation(context: str) -> dict:
     try:
-        resp = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=prompt
-        )
-        ai_text = getattr(resp, "text", None) or "⚠️ No recommendation generated."
+        ai_text = "".join(_policy_chunks(context)) or "⚠️ No recommendation generated."
         return {"status": "success", "recommendations": ai_text}
     except Exception as e:
         return {"status": "error", "recommendations": f"⚠️ AI error: {e}"}
 
+
+def policy_recommendation_stream(context: str) -> Iterator[str]:
+    """Streaming variant of policy_recommendation for the web UI."""
+    generated = False
+    try:
+        for text in _policy_chunks(context):
+            generated = True
+            yield text
+    except Exception as e:
+        yield f"⚠️ AI error: {e}"
+        return
+    if not generated:
+        yield "⚠️ No recommendation generated."
+
 # === 4️⃣ Root Agent ===
 root_agent = Agent(
     name="Digital_Opposition_Kenya",
@@ -1,10 +1,45 @@
-from flask import Flask, render_template, request, jsonify
-from agents.opposition_agent import analyze_government_news, citizen_question, policy_recommendation
-import json
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from agents.opposition_agent import (
+    analyze_government_news,
+    citizen_question_stream,
+    clear_feed_cache,
+    policy_recommendation_stream,
+    read_json,
+    recent_analyses,
+)
 import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+import orjson
 
 app = Flask(__name__)
 
+# Background analysis jobs: /analyze returns a job id, /analyze/<id> polls it
+EXECUTOR = ThreadPoolExecutor(max_workers=2)
+JOBS: Dict[str, Future] = {}
+JOBS_LOCK = threading.Lock()
+MAX_FINISHED_JOBS = 20
+
+
+def sse_response(chunks):
+    """Stream text chunks to the browser as Server-Sent Events."""
+    def generate():
+        try:
+            for text in chunks:
+                yield f"data: {orjson.dumps({'text': text}).decode()}\n\n"
+        except Exception as e:
+            yield f"data: {orjson.dumps({'error': str(e)}).decode()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ----------------------
 # Home page
 # ----------------------
@@ -18,17 +53,37 @@ def index():
 # ----------------------
 @app.route("/analyze", methods=["GET"])
 def analyze_news():
+    with JOBS_LOCK:
+        # Share an in-flight run instead of starting a second one
+        for job_id, future in JOBS.items():
+            if not future.done():
+                return jsonify({"job_id": job_id, "status": "running"}), 202
+
+        finished = [job_id for job_id, future in JOBS.items() if future.done()]
+        for job_id in finished[:-MAX_FINISHED_JOBS]:
+            del JOBS[job_id]
+
+        job_id = uuid.uuid4().hex
+        # Analyses are persisted to the SQLite store inside analyze_government_news
+        JOBS[job_id] = EXECUTOR.submit(analyze_government_news)
+    return jsonify({"job_id": job_id, "status": "running"}), 202
+
+
+@app.route("/analyze/<job_id>", methods=["GET"])
+def analyze_news_status(job_id):
+    with JOBS_LOCK:
+        future = JOBS.get(job_id)
+    if future is None:
+        return jsonify({"status": "error", "message": "⚠️ Unknown analysis job."}), 404
+    if not future.done():
+        return jsonify({"job_id": job_id, "status": "running"}), 202
+
     try:
-        result = analyze_government_news()
-        # Save the analysis for later use
-        with open("analysis_output.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, indent=4, ensure_ascii=False)
-        return jsonify(result)
+        return jsonify(future.result())
     except Exception as e:
         # If live fetch fails, try fallback cache
-        if os.path.exists("cache/news_cache.json"):
-            with open("cache/news_cache.json", "r", encoding="utf-8") as f:
-                cached_articles = json.load(f)
+        cached_articles = read_json(Path("cache/news_cache.json"))
+        if cached_articles:
             return jsonify({
                 "status": "warning",
                 "message": f"⚠️ Live fetch failed: {e}. Using cached news.",
@@ -47,11 +102,8 @@ def ask_question():
     if not question:
         return jsonify({"error": "Question is required"}), 400
 
-    try:
-        answer = citizen_question(question)
-        return jsonify(answer)
-    except Exception as e:
-        return jsonify({"error": f"⚠️ Failed to answer question: {e}"}), 500
+    # Stream tokens as Gemini produces them instead of waiting for the full answer
+    return sse_response(citizen_question_stream(question))
 
 
 # ----------------------
@@ -65,26 +117,38 @@ def recommend_policy_endpoint():
         data = request.get_json()
         topic = data.get("topic", "").strip()
 
-    # Fallback: use latest analysis if GET request or POST topic empty
+    # Fallback: use latest analyses if GET request or POST topic empty
+    if not topic:
+        topic = "\n".join(recent_analyses(limit=15))
     if not topic:
-        if os.path.exists("analysis_output.json"):
-            with open("analysis_output.json", "r", encoding="utf-8") as f:
-                analysis_data = json.load(f)
+        analysis_data = read_json(Path("analysis_output.json"))
+        if analysis_data:
             # Combine all AI analyses into the context
             topic = "\n".join([art.get("analysis", "") for art in analysis_data.get("analyses", [])])
         else:
             topic = "Current government policy and recent news in Kenya."
 
-    try:
-        result = policy_recommendation(topic)
-        return jsonify({"recommendation": result.get("recommendations", "⚠️ No recommendation generated.")})
-    except Exception as e:
-        return jsonify({"error": f"⚠️ Failed to generate policy recommendation: {e}"}), 500
+    return sse_response(policy_recommendation_stream(topic))
+
+
+# ----------------------
+# Admin: drop the in-process feed cache
+# ----------------------
+@app.route("/admin/feed-cache/clear", methods=["POST"])
+def clear_feed_cache_endpoint():
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    if not admin_token or request.headers.get("X-Admin-Token") != admin_token:
+        return jsonify({"error": "Forbidden"}), 403
+    clear_feed_cache()
+    return jsonify({"status": "success", "message": "Feed cache cleared."})
 
 
 # ----------------------
 # Run Flask app
 # ----------------------
+# Local development only — in production serve with gunicorn (see gunicorn.conf.py):
+#   gunicorn app:app
 if __name__ == "__main__":
     # Optional: set host="0.0.0.0" if you want external access
-    app.run(debug=True, port=5000)
+    # Debugger/reloader are opt-in only: FLASK_DEBUG=1 (off by default)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", port=5000)
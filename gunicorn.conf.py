@@ -0,0 +1,28 @@
+# Production server config — run with:  gunicorn app:app
+# (equivalent to: gunicorn -k gthread -w 1 --threads 16 --timeout 120 app:app)
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+
+# The hot path is requests + Gemini HTTP calls, which release the GIL while
+# waiting, so threads give real concurrency for /analyze, /ask and /recommend.
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+
+# Background /analyze jobs and the in-process caches live in worker memory, so a
+# job started on one worker can't be polled on another. Keep one worker unless
+# REDIS_URL is set and requests are routed stickily.
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+
+# Streaming answers and batch analyses can take a while to finish
+timeout = 120
+
+
+def post_fork(server, worker):
+    # With preload_app the agent module is imported before forking; make sure each
+    # worker builds its own Gemini client, HTTP connection pool and SQLite connection.
+    import sys
+
+    agent = sys.modules.get("agents.opposition_agent")
+    if agent is not None:
+        agent.reset_clients()
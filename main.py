@@ -2,9 +2,10 @@ from agents.opposition_agent import (
     analyze_government_news,
     citizen_question,
     policy_recommendation,
-    root_agent
+    root_agent,
+    write_json,
 )
-import json  # ✅ Added import for saving analysis
+from pathlib import Path
 
 def main():
     print("\nType 'start' to activate Opposition AI Kenya:")
@@ -27,9 +28,8 @@ def main():
 
             # ✅ Save analyses to a JSON file for record keeping
             try:
-                with open("analysis_output.json", "w", encoding="utf-8") as f:
-                    json.dump(analysis_result, f, indent=4, ensure_ascii=False)
-                print("\n💾 All analyses have been saved to 'analysis_output.json'\n")
+                saved_to = write_json(Path("analysis_output.json"), analysis_result)
+                print(f"\n💾 All analyses have been saved to '{saved_to}'\n")
             except Exception as e:
                 print(f"⚠️ Error saving analyses: {e}\n")
         else:
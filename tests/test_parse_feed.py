@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+pytest.importorskip("lxml")
+pytest.importorskip("feedparser")
+pytest.importorskip("google.genai")
+pytest.importorskip("google.adk")
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+from agents.opposition_agent import parse_feed  # noqa: E402
+
+
+def test_well_formed_rss():
+    entries = parse_feed(
+        b'<rss><channel><item><title>Budget &amp; tax</title>'
+        b'<link>http://a/1?x=1&amp;y=2</link>'
+        b'<description>&lt;p&gt;Hello&lt;/p&gt;</description></item></channel></rss>'
+    )
+    assert entries == [{
+        "title": "Budget & tax",
+        "link": "http://a/1?x=1&y=2",
+        "summary": "<p>Hello</p>",
+    }]
+
+
+def test_bare_ampersand_is_not_dropped():
+    entries = parse_feed(
+        b'<rss><channel><item><title>Q&A with MPs</title>'
+        b'<link>http://a/1?x=1&y=2</link>'
+        b'<description>Summary</description></item></channel></rss>'
+    )
+    assert entries[0]["title"] == "Q&A with MPs"
+    assert entries[0]["link"] == "http://a/1?x=1&y=2"
+
+
+def test_undefined_entity_keeps_later_escapes():
+    entries = parse_feed(
+        b'<rss><channel><item><title>It&rsquo;s official</title>'
+        b'<link>http://a/2</link>'
+        b'<description>&lt;p&gt;Hello&lt;/p&gt;</description></item></channel></rss>'
+    )
+    assert "<p>Hello</p>" in entries[0]["summary"]